@@ -1,6 +1,5 @@
 import sys
-from colormaps import opencv_colormaps
-from functions import return_color_map, to_sepia, to_grayscale
+from functions import apply_filter, filter_names, resize_image
 import numpy as np
 import cv2
 import requests
@@ -19,11 +18,14 @@ from PIL import Image
 
 from unsplash_api import UnsplashAPI
 from paint_tools import PaintMixin #our brush!!!
+from crop_tools import CropMixin
+from memory_tools import MemoryMixin, DISPLAY
 
 
-class Home(PaintMixin, QWidget):
+class Home(MemoryMixin, CropMixin, PaintMixin, QWidget):
     def __init__(self):
         super().__init__()
+        self.setup_memory()
         self.setWindowTitle("Dollar Store Photoshop")
         self.resize(1000, 680)
 
@@ -62,12 +64,11 @@ class Home(PaintMixin, QWidget):
         top_bar.addWidget(self.zoom_out_btn)
         top_bar.addSpacing(12)
         top_bar.addWidget(self.back_btn)
+        top_bar.addWidget(self.memory_btn)
 
         # FIlters code
         self.drop_label = QLabel("Filters")
-        self.drop_down_list = ["Choose a filter", "Grayscale", "Sepia", "Invert"]
-        for i in opencv_colormaps:
-            self.drop_down_list.append(i)
+        self.drop_down_list = ["Choose a filter"] + filter_names()
 
         self.drop_combo_box = QComboBox()
         self.drop_combo_box.addItems(self.drop_down_list)
@@ -84,6 +85,7 @@ class Home(PaintMixin, QWidget):
         self.resize_btn.clicked.connect(self.open_resize_dialog)
 
         brush_title, color_grid = self.setup_painting()
+        self.setup_cropping()
 
         # SAVING button
         self.save_btn = QPushButton("Save…")
@@ -97,6 +99,8 @@ class Home(PaintMixin, QWidget):
         tools_col.addSpacing(16)
         tools_col.addWidget(QLabel("Size"))
         tools_col.addWidget(self.resize_btn)
+        tools_col.addWidget(self.crop_btn)
+        tools_col.addWidget(self.uncrop_btn)
         tools_col.addSpacing(16)
         tools_col.addWidget(brush_title)
         tools_col.addLayout(color_grid)
@@ -113,15 +117,11 @@ class Home(PaintMixin, QWidget):
         self.editor_panel.setVisible(False)
 
         assets_path = Path(__file__).parent / "assets"
-        logo_path = assets_path / "_dollarstore.png"
-        if logo_path.exists():
-            lpix = QPixmap(str(logo_path))
-            if not lpix.isNull():
-                self.logo_pix = lpix
-                self.preview_label.setPixmap(
-                    lpix.scaled(420, 420, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                )
-                self.preview_label.setVisible(True)
+        self.logo_path = assets_path / "_dollarstore.png"
+        self.load_logo()
+        if self.logo_pix is not None:
+            self.preview_label.setPixmap(self.logo_pix)
+            self.preview_label.setVisible(True)
 
         self.scroll = QScrollArea()
         self.scroll.setWidgetResizable(True)
@@ -140,13 +140,25 @@ class Home(PaintMixin, QWidget):
         main.addWidget(self.status)
         self.setLayout(main)
 
+    def load_logo(self):
+        # only the 420px version is kept, the full logo is thrown away right here
+        if not self.logo_path.exists():
+            return
+        lpix = QPixmap(str(self.logo_path))
+        if lpix.isNull():
+            return
+        self.logo_pix = lpix.scaled(420, 420, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.track_logo()
+
     def enter_edit_mode(self, source_text: str):
         self.editor_panel.setVisible(True)
         self.current_source_text = source_text
 
     def reset_to_home(self):
         self.img = None
+        self.orig_img = None
         self.paint_base = None
+        self.buffers.release("display")
         self.drop_combo_box.setCurrentIndex(0)
         self.editor_panel.setVisible(False)
         self.current_source_text = None
@@ -154,10 +166,12 @@ class Home(PaintMixin, QWidget):
         self.zoom = 1.0
         self.last_scale = 1.0
         self.preview_label.set_allow_draw(False)
+        self.clear_crop()
+        if self.logo_pix is None:
+            # the memory budget may have dropped it
+            self.load_logo()
         if self.logo_pix is not None:
-            self.preview_label.setPixmap(
-                self.logo_pix.scaled(420, 420, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            )
+            self.preview_label.setPixmap(self.logo_pix)
             self.preview_label.setVisible(True)
         else:
             self.preview_label.clear()
@@ -179,6 +193,8 @@ class Home(PaintMixin, QWidget):
         self.img = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
         self.orig_img = self.img.copy()
         self.paint_base = self.img.copy()
+        self.buffers.enforce()
+        self.clear_crop()
         self.manual_zoom = False
         self.zoom = 1.0
         self.last_scale = 1.0
@@ -219,6 +235,8 @@ class Home(PaintMixin, QWidget):
         self.img = img_rgb
         self.orig_img = self.img.copy()
         self.paint_base = self.img.copy()
+        self.buffers.enforce()
+        self.clear_crop()
         self.manual_zoom = False
         self.zoom = 1.0
         self.last_scale = 1.0
@@ -251,33 +269,30 @@ class Home(PaintMixin, QWidget):
             self.status.setText("pick something")
             return
 
-        img = self.img.copy()
-
-
-        match option:
-            case "Bone Color":
-                img = to_bone_color(img)
-            case "Grayscale":
-                img = to_grayscale(img)
-            case "Sepia":
-                img = to_sepia(img)
-            case _:
-                # Everything else
-                bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-                gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-                new_bgr = cv2.applyColorMap(gray, return_color_map(option))
-                img = cv2.cvtColor(new_bgr, cv2.COLOR_BGR2RGB)
-
+        # filters make a few temporaries the size of the image (sepia works in float32)
+        self.buffers.enforce(reserve=self.crop_view(self.img).nbytes * 4)
+        try:
+            img = apply_filter(self.crop_view(self.img), option)
+        except ValueError as e:
+            self.status.setText(str(e))
+            return
 
-        self.img = img
+        if self.crop_rect is None:
+            self.img = img
+        else:
+            # filter only the cropped area, written back through the view
+            self.crop_view(self.img)[:] = img
         self.paint_base = self.img.copy()
+        self.buffers.enforce()
         self.last_scale = 1.0
         self.show_image(self.img)
         self.status.setText(f"Applied filter: {option}")
 
     # Revert image
     def revert_image(self):
-        self.img = self.orig_img
+        self.img = self.orig_img.copy()
+        self.buffers.enforce()
+        self.clear_crop()
         self.show_image(self.img)
         self.status.setText("Reverted to original image")
 
@@ -289,7 +304,7 @@ class Home(PaintMixin, QWidget):
             self.status.setText("Load an image first.")
             return
 
-        h, w, _ = self.img.shape
+        h, w, _ = self.crop_view(self.img).shape
         aspect = w / h if h else 1.0
 
         dlg = QDialog(self)
@@ -325,11 +340,11 @@ class Home(PaintMixin, QWidget):
         if dlg.exec() == QDialog.Accepted:
             new_w = w_spin.value()
             new_h = h_spin.value()
-            upscaling = (new_w * new_h) > (w * h)
-            interp = cv2.INTER_CUBIC if upscaling else cv2.INTER_AREA
-            resized = cv2.resize(self.img, (new_w, new_h), interpolation=interp)
-            self.img = resized
+            self.commit_crop()
+            self.buffers.enforce(reserve=new_w * new_h * 3)
+            self.img = resize_image(self.img, new_w, new_h)
             self.paint_base = self.img.copy()
+            self.buffers.enforce()
             self.last_scale = 1.0
             self.show_image(self.img)
             self.status.setText(f"Resized to {new_w}×{new_h}")
@@ -359,16 +374,23 @@ class Home(PaintMixin, QWidget):
             else:
                 path += ".tiff"
         try:
-            Image.fromarray(self.img).save(path, quality=95)
+            Image.fromarray(self.materialized_img()).save(path, quality=95)
             self.status.setText(f"Saved: {path}")
         except Exception as e:
             self.status.setText(f"Save failed: {e}")
 
     def show_image(self, img_rgb: np.ndarray, preserve_scale: bool = False):
-        h, w, ch = img_rgb.shape
-        bytes_per_line = ch * w
-        qimg = QImage(img_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        base = QPixmap.fromImage(qimg)
+        h, w, ch = self.crop_view(img_rgb).shape
+        if self.crop_rect is None:
+            bytes_per_line = ch * w
+            qimg = QImage(img_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
+        else:
+            # point QImage into the full buffer with its row stride so the crop isn't copied
+            x, y = self.crop_offset()
+            bytes_per_line = img_rgb.strides[0]
+            start = y * bytes_per_line + x * img_rgb.strides[1]
+            buf = memoryview(img_rgb).cast("B")[start:]
+            qimg = QImage(buf, w, h, bytes_per_line, QImage.Format_RGB888)
 
         if self.manual_zoom:
             scale = self.zoom
@@ -381,11 +403,16 @@ class Home(PaintMixin, QWidget):
                 scale = min(vw / max(w, 1), vh / max(h, 1))
                 self.last_scale = scale
 
-        disp = base.scaled(
+        # at high zoom the scaled pixmap can be huge, shrink it if it won't fit the budget
+        scale *= self.buffers.fit_display("display", int(w * scale), int(h * scale))
+        # scale the QImage (a view of img) so no full size pixmap is ever made
+        disp = QPixmap.fromImage(qimg.scaled(
             int(w * scale), int(h * scale),
             Qt.KeepAspectRatio, Qt.SmoothTransformation
-        )
+        ))
         self.preview_label.setPixmap(disp)
+        # fit_display already made room for it, nothing more to enforce
+        self.buffers.track("display", disp, DISPLAY, enforce=False)
         self.preview_label.set_scale(scale)
         self.preview_label.setVisible(True)
 
@@ -0,0 +1,84 @@
+import numpy as np
+
+from PySide6.QtWidgets import QPushButton
+
+
+# Crop is kept as a rectangle over self.img and only read through numpy views,
+# so dragging a new crop never copies pixels until commit_crop() is called.
+class CropMixin:
+    def setup_cropping(self):
+
+        self.crop_rect: tuple[int, int, int, int] | None = None
+
+        self.crop_btn = QPushButton("Crop")
+        self.crop_btn.setCheckable(True)
+        self.crop_btn.toggled.connect(self.toggle_cropping)
+
+        self.uncrop_btn = QPushButton("Uncrop")
+        self.uncrop_btn.clicked.connect(self.reset_crop)
+
+        self.preview_label.crop_selected.connect(self.on_crop_selected)
+
+    def crop_offset(self) -> tuple[int, int]:
+        if self.crop_rect is None:
+            return 0, 0
+        return self.crop_rect[0], self.crop_rect[1]
+
+    def crop_view(self, img: np.ndarray) -> np.ndarray:
+        # slicing gives a view that shares memory with img, no copy
+        if self.crop_rect is None:
+            return img
+        x, y, w, h = self.crop_rect
+        return img[y:y + h, x:x + w]
+
+    def materialized_img(self) -> np.ndarray | None:
+        if self.img is None:
+            return None
+        return np.ascontiguousarray(self.crop_view(self.img))
+
+    def clear_crop(self):
+        self.crop_rect = None
+        self.preview_label.set_crop_offset(0, 0)
+        if self.crop_btn.isChecked():
+            self.crop_btn.setChecked(False)
+
+    # Crop code
+    def toggle_cropping(self, enabled: bool):
+        self.preview_label.set_allow_crop(enabled)
+        if enabled and self.brush_enabled:
+            self.paint_toggle_btn.setChecked(False)
+        self.status.setText("Drag a box to crop." if enabled else "Cropping disabled.")
+
+    def on_crop_selected(self, x0: int, y0: int, x1: int, y1: int):
+        if self.img is None:
+            return
+        H, W, _ = self.img.shape
+        left, right = sorted((max(0, min(x0, W - 1)), max(0, min(x1, W - 1))))
+        top, bottom = sorted((max(0, min(y0, H - 1)), max(0, min(y1, H - 1))))
+        w = right - left + 1
+        h = bottom - top + 1
+        if w < 2 or h < 2:
+            self.status.setText("Crop too small.")
+            return
+        self.crop_rect = (left, top, w, h)
+        self.preview_label.set_crop_offset(left, top)
+        self.last_scale = 1.0
+        self.show_image(self.img)
+
+    def reset_crop(self):
+        if self.img is None or self.crop_rect is None:
+            return
+        self.clear_crop()
+        self.last_scale = 1.0
+        self.show_image(self.img)
+        self.status.setText("Crop removed.")
+
+    def commit_crop(self):
+        # destructive ops (resize) need the crop as its own contiguous buffer
+        if self.img is None or self.crop_rect is None:
+            return
+        if self.paint_base is not None and self.paint_base.shape == self.img.shape:
+            self.paint_base = np.ascontiguousarray(self.crop_view(self.paint_base))
+        self.img = self.materialized_img()
+        self.buffers.enforce()
+        self.clear_crop()
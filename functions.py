@@ -38,3 +38,34 @@ def to_grayscale(picture):
 
     return img
 
+
+def to_inverted(picture):
+    img = cv2.bitwise_not(picture)
+    return img
+
+def apply_filter(picture, option):
+    # shared by the GUI and server.py so both produce the same result
+    match option:
+        case "Grayscale":
+            return to_grayscale(picture)
+        case "Sepia":
+            return to_sepia(picture)
+        case "Invert":
+            return to_inverted(picture)
+        case _:
+            color_map = return_color_map(option)
+            if color_map is None:
+                raise ValueError(f"Unknown filter: {option}")
+            bgr = cv2.cvtColor(picture, cv2.COLOR_RGB2BGR)
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+            new_bgr = cv2.applyColorMap(gray, color_map)
+            return cv2.cvtColor(new_bgr, cv2.COLOR_BGR2RGB)
+
+def filter_names():
+    return ["Grayscale", "Sepia", "Invert"] + list(opencv_colormaps)
+
+def resize_image(picture, width, height):
+    h, w = picture.shape[:2]
+    upscaling = (width * height) > (w * h)
+    interp = cv2.INTER_CUBIC if upscaling else cv2.INTER_AREA
+    return cv2.resize(picture, (width, height), interpolation=interp)
@@ -0,0 +1,110 @@
+'''
+Load generator for server.py. Fires concurrent requests at a local server and
+prints throughput, latency percentiles, status codes and the server metrics.
+
+    python server.py --quiet &
+    python loadgen.py --requests 200 --concurrency 16 --filter Sepia
+    python loadgen.py --image photo.jpg --resize 320x240
+'''
+
+import argparse
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import cv2
+import requests
+
+
+def make_test_image(width: int, height: int) -> bytes:
+    rng = np.random.default_rng(205)
+    img = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    ok, out = cv2.imencode(".png", img)
+    if not ok:
+        raise RuntimeError("Could not encode test image.")
+    return out.tobytes()
+
+def chunks(data: bytes, size: int = 64 * 1024):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the processing server")
+    parser.add_argument("--url", default="http://127.0.0.1:8205")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--image", help="image file to upload (default: random PNG)")
+    parser.add_argument("--size", default="256x256", help="random image size, WxH")
+    parser.add_argument("--filter", default="Sepia")
+    parser.add_argument("--resize", help="use /resize with WxH instead of /filter")
+    parser.add_argument("--chunked", action="store_true", help="stream uploads chunked")
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            payload = f.read()
+    else:
+        w, h = (int(v) for v in args.size.lower().split("x"))
+        payload = make_test_image(w, h)
+
+    if args.resize:
+        rw, rh = (int(v) for v in args.resize.lower().split("x"))
+        endpoint = f"{args.url}/resize"
+        params = {"width": rw, "height": rh}
+    else:
+        endpoint = f"{args.url}/filter"
+        params = {"name": args.filter}
+
+    local = threading.local()
+    statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+
+    def one_request(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = chunks(payload) if args.chunked else payload
+        start = time.perf_counter()
+        try:
+            resp = session.post(endpoint, params=params, data=body, stream=True, timeout=120)
+            for _ in resp.iter_content(64 * 1024):
+                pass
+            status = resp.status_code
+        except requests.exceptions.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"payload {len(payload) / 1024:.1f} KiB -> {endpoint}")
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_request, range(args.requests)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+
+    def pct(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    print(f"Elapsed: {wall:.2f}s  Throughput: {statuses[200] / wall:.1f} ok/s")
+    print(f"Latency ms  p50 {pct(0.50):.1f}  p95 {pct(0.95):.1f}  p99 {pct(0.99):.1f}")
+    print("Status codes:", dict(statuses))
+
+    try:
+        print("Server metrics:", requests.get(f"{args.url}/metrics", timeout=5).json())
+    except requests.exceptions.RequestException as e:
+        print(f"Could not read metrics: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import os
+import tempfile
+
+import numpy as np
+from dotenv import load_dotenv
+
+from PySide6.QtWidgets import QPushButton, QMessageBox
+
+load_dotenv()
+
+DEFAULT_BUDGET_MB = 2048
+
+# kinds of buffers the registry knows how to shrink, in the order it tries them
+CACHE = "cache"          # can be dropped and rebuilt
+SNAPSHOT = "snapshot"    # inactive copies (orig_img, paint_base), can go to disk
+DISPLAY = "display"      # pixmaps, can be made smaller
+IMAGE = "image"          # the working image, never touched
+
+
+def buffer_nbytes(obj) -> int:
+    if obj is None:
+        return 0
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if hasattr(obj, "sizeInBytes"):  # QImage
+        return int(obj.sizeInBytes())
+    if hasattr(obj, "depth"):  # QPixmap
+        return obj.width() * obj.height() * obj.depth() // 8
+    return 0
+
+def format_mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+class BufferEntry:
+    def __init__(self, name, obj, kind, replace=None, drop=None):
+        self.name = name
+        self.obj = obj
+        self.kind = kind
+        self.replace = replace
+        self.drop = drop
+        self.spill_path: str | None = None
+
+    @property
+    def nbytes(self) -> int:
+        if self.spill_path:
+            # pages live in the spill file, the OS can drop them at will
+            return 0
+        return buffer_nbytes(self.obj)
+
+    @property
+    def spilled_nbytes(self) -> int:
+        return int(self.obj.nbytes) if self.spill_path else 0
+
+
+class BufferRegistry:
+    """
+    Keeps track of every image and pixmap buffer the app holds and keeps the
+    total under a budget.
+
+    When over budget it first drops caches, then spills inactive snapshots to
+    memory mapped files, and as a last resort tells show_image to use a smaller
+    display pixmap (see fit_display). The budget comes from DSP_MEMORY_BUDGET_MB
+    and the spill folder from DSP_SPILL_DIR when not passed in.
+    """
+
+    def __init__(self, budget_bytes: int | None = None, spill_dir: str | None = None):
+        if budget_bytes is None:
+            budget_mb = float(os.getenv("DSP_MEMORY_BUDGET_MB", DEFAULT_BUDGET_MB))
+            budget_bytes = int(budget_mb * 1024 * 1024)
+        self.budget = budget_bytes
+        self.spill_dir = spill_dir or os.getenv("DSP_SPILL_DIR") or tempfile.gettempdir()
+        self.entries: dict[str, BufferEntry] = {}
+        self.last_actions: list[str] = []
+
+    def track(self, name: str, obj, kind: str, replace=None, drop=None, enforce: bool = True):
+        """
+        Register obj under name, replacing whatever was there before.
+
+        replace(new_obj) is called when a snapshot gets swapped for its spilled
+        copy, drop() when a cache is thrown away. Passing None just releases name.
+        """
+        self.release(name)
+        if obj is None:
+            return
+        self.entries[name] = BufferEntry(name, obj, kind, replace, drop)
+        if enforce:
+            self.enforce()
+
+    def release(self, name: str):
+        entry = self.entries.pop(name, None)
+        if entry is not None and entry.spill_path:
+            entry.obj = None
+            try:
+                os.remove(entry.spill_path)
+            except OSError:
+                # still mapped somewhere (Windows), the temp folder will clean it up
+                pass
+
+    def close(self):
+        for name in list(self.entries):
+            self.release(name)
+
+    def used(self, exclude: str | None = None) -> int:
+        return sum(e.nbytes for n, e in self.entries.items() if n != exclude)
+
+    def enforce(self, reserve: int = 0, exclude: str | None = None) -> list[str]:
+        """
+        Drop caches, then spill snapshots until used + reserve fits the budget.
+        Returns what was done, also kept in last_actions.
+        """
+        actions = []
+
+        def over():
+            return self.used(exclude) + reserve > self.budget
+
+        if not over():
+            return actions
+
+        for entry in self._by_size(CACHE):
+            if not over():
+                break
+            if entry.drop is not None:
+                entry.drop()
+            actions.append(f"dropped {entry.name} ({format_mb(entry.nbytes)})")
+            self.entries.pop(entry.name, None)
+
+        for entry in self._by_size(SNAPSHOT):
+            if not over():
+                break
+            if entry.spill_path or entry.replace is None or entry.nbytes == 0:
+                continue
+            freed = entry.nbytes
+            error = self._spill(entry)
+            if error is None:
+                actions.append(f"spilled {entry.name} to disk ({format_mb(freed)})")
+            else:
+                actions.append(f"could not spill {entry.name}: {error}")
+
+        if actions:
+            self.last_actions = actions
+        return actions
+
+    def fit_display(self, name: str, width: int, height: int, bytes_per_pixel: int = 4) -> float:
+        """
+        Make room for a width x height display pixmap that will replace name.
+        Returns the factor (<= 1) the caller should shrink it by to stay in budget.
+        """
+        needed = width * height * bytes_per_pixel
+        self.enforce(reserve=needed, exclude=name)
+        available = self.budget - self.used(exclude=name)
+        if needed <= 0 or available >= needed:
+            return 1.0
+        factor = max(0.05, (max(available, 0) / needed) ** 0.5)
+        self.last_actions = [f"downscaled {name} to {int(factor * 100)}%"]
+        return factor
+
+    def usage(self) -> dict:
+        by_kind: dict[str, int] = {}
+        for entry in self.entries.values():
+            by_kind[entry.kind] = by_kind.get(entry.kind, 0) + entry.nbytes
+        return {
+            "used": self.used(),
+            "budget": self.budget,
+            "spilled": sum(e.spilled_nbytes for e in self.entries.values()),
+            "by_kind": by_kind,
+            "buffers": {n: e.nbytes for n, e in self.entries.items()},
+        }
+
+    def report(self) -> str:
+        u = self.usage()
+        lines = [f"In memory: {format_mb(u['used'])} of {format_mb(u['budget'])}",
+                 f"Spilled to disk: {format_mb(u['spilled'])}", ""]
+        for name, entry in sorted(self.entries.items(), key=lambda kv: -kv[1].nbytes):
+            where = "disk" if entry.spill_path else "ram"
+            size = entry.spilled_nbytes if entry.spill_path else entry.nbytes
+            lines.append(f"{name} [{entry.kind}, {where}]: {format_mb(size)}")
+        if self.last_actions:
+            lines.append("")
+            lines.append("Last cleanup: " + "; ".join(self.last_actions))
+        return "\n".join(lines)
+
+    def _by_size(self, kind: str) -> list[BufferEntry]:
+        found = [e for e in self.entries.values() if e.kind == kind]
+        return sorted(found, key=lambda e: e.nbytes, reverse=True)
+
+    def _spill(self, entry: BufferEntry) -> str | None:
+        # returns an error message instead of raising, the GUI keeps going without the spill
+        arr = entry.obj
+        path = None
+        try:
+            fd, path = tempfile.mkstemp(prefix=f"dsp_{entry.name}_", suffix=".raw",
+                                        dir=self.spill_dir)
+            os.close(fd)
+            # a plain write fails with OSError on a full disk, filling a memmap would SIGBUS
+            np.ascontiguousarray(arr).tofile(path)
+            # copy-on-write so in-place edits never touch the file
+            spilled = np.memmap(path, dtype=arr.dtype, mode="c", shape=arr.shape)
+        except OSError as e:
+            if path is not None:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return str(e)
+        entry.obj = spilled
+        entry.spill_path = path
+        entry.replace(entry.obj)
+        return None
+
+
+def tracked_buffer(name: str, kind: str):
+    # property that registers every new array assigned to it with self.buffers.
+    # It doesn't enforce the budget: callers swap several buffers in a row and
+    # call self.buffers.enforce() once the state is consistent, otherwise a
+    # snapshot that is about to be replaced could get spilled to disk for nothing.
+    attr = "_" + name
+
+    def getter(self):
+        return getattr(self, attr, None)
+
+    def setter(self, value):
+        setattr(self, attr, value)
+        self.buffers.track(name, value, kind, replace=lambda a: setattr(self, attr, a),
+                           enforce=False)
+
+    return property(getter, setter)
+
+
+class MemoryMixin:
+    img = tracked_buffer("img", IMAGE)
+    orig_img = tracked_buffer("orig_img", SNAPSHOT)
+    paint_base = tracked_buffer("paint_base", SNAPSHOT)
+
+    def setup_memory(self):
+        # must run before anything assigns img, orig_img or paint_base
+        self.buffers = BufferRegistry()
+
+        self.memory_btn = QPushButton("Memory")
+        self.memory_btn.clicked.connect(self.show_memory_usage)
+
+    def track_logo(self):
+        def drop_logo():
+            self.logo_pix = None
+        # load_logo calls this from reset_to_home too, the next enforce() may drop it again
+        self.buffers.track("logo", self.logo_pix, CACHE, drop=drop_logo, enforce=False)
+
+    def show_memory_usage(self):
+        u = self.buffers.usage()
+        self.status.setText(f"Memory: {format_mb(u['used'])} / {format_mb(u['budget'])}"
+                            f" • {format_mb(u['spilled'])} on disk")
+        QMessageBox.information(self, "Memory usage", self.buffers.report())
+
+    def closeEvent(self, event):
+        self.buffers.close()
+        super().closeEvent(event)
@@ -1,28 +1,42 @@
 import numpy as np
 import cv2
 
-from PySide6.QtWidgets import QLabel, QPushButton, QGridLayout
-from PySide6.QtCore import Qt, QPoint, QRect, Signal
+from PySide6.QtWidgets import QLabel, QPushButton, QGridLayout, QRubberBand
+from PySide6.QtCore import Qt, QPoint, QRect, QSize, Signal
 
 
 #canavs setup
 class DrawingLabel(QLabel):
     draw_line = Signal(int, int, int, int)
+    crop_selected = Signal(int, int, int, int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMouseTracking(True)
         self._allow_draw = False
+        self._allow_crop = False
         self._scale = 1.0
+        self._offset = (0, 0)
         self._last_pos: QPoint | None = None
+        self._crop_origin: QPoint | None = None
+        self._rubber_band = QRubberBand(QRubberBand.Rectangle, self)
 
     def set_allow_draw(self, allow: bool):
         self._allow_draw = allow
         self._last_pos = None
 
+    def set_allow_crop(self, allow: bool):
+        self._allow_crop = allow
+        self._crop_origin = None
+        self._rubber_band.hide()
+
     def set_scale(self, s: float):
         self._scale = max(1e-9, float(s))
 
+    # the displayed pixmap may be a crop view, so image coords are shifted by its top left
+    def set_crop_offset(self, x: int, y: int):
+        self._offset = (int(x), int(y))
+
     def _pixmap_rect_in_widget(self) -> QRect:
         pm = self.pixmap()
         if pm is None or pm.isNull():
@@ -38,11 +52,42 @@ class DrawingLabel(QLabel):
         if not pm_rect.contains(p):
             return None
         local = p - pm_rect.topLeft()
-        x = int(local.x() / self._scale)
-        y = int(local.y() / self._scale)
+        x = int(local.x() / self._scale) + self._offset[0]
+        y = int(local.y() / self._scale) + self._offset[1]
         return x, y
 
+    def _clamp_to_pixmap(self, p: QPoint) -> QPoint:
+        pm_rect = self._pixmap_rect_in_widget()
+        return QPoint(
+            max(pm_rect.left(), min(p.x(), pm_rect.right())),
+            max(pm_rect.top(), min(p.y(), pm_rect.bottom())),
+        )
+
+    # Crop selection
+    def _crop_press(self, event):
+        pos = event.position().toPoint()
+        if self._to_image_xy(pos) is None:
+            return
+        self._crop_origin = pos
+        self._rubber_band.setGeometry(QRect(pos, QSize()))
+        self._rubber_band.show()
+
+    def _crop_move(self, event):
+        cur = self._clamp_to_pixmap(event.position().toPoint())
+        self._rubber_band.setGeometry(QRect(self._crop_origin, cur).normalized())
+
+    def _crop_release(self, event):
+        cur = self._clamp_to_pixmap(event.position().toPoint())
+        a = self._to_image_xy(self._crop_origin)
+        b = self._to_image_xy(cur)
+        self._crop_origin = None
+        self._rubber_band.hide()
+        if a is not None and b is not None:
+            self.crop_selected.emit(a[0], a[1], b[0], b[1])
+
     def mousePressEvent(self, event):
+        if self._allow_crop and self.pixmap() is not None and event.button() == Qt.LeftButton:
+            return self._crop_press(event)
         if not self._allow_draw or self.pixmap() is None:
             return super().mousePressEvent(event)
         if event.button() != Qt.LeftButton:
@@ -53,6 +98,8 @@ class DrawingLabel(QLabel):
         self._last_pos = pos
 
     def mouseMoveEvent(self, event):
+        if self._allow_crop and self._crop_origin is not None:
+            return self._crop_move(event)
         if not self._allow_draw or self.pixmap() is None or self._last_pos is None:
             return super().mouseMoveEvent(event)
         cur = event.position().toPoint()
@@ -65,6 +112,10 @@ class DrawingLabel(QLabel):
         self._last_pos = cur
 
     def mouseReleaseEvent(self, event):
+        if self._allow_crop and self._crop_origin is not None:
+            if event.button() == Qt.LeftButton:
+                self._crop_release(event)
+            return
         if not self._allow_draw or self.pixmap() is None or self._last_pos is None:
             return super().mouseReleaseEvent(event)
         if event.button() == Qt.LeftButton:
@@ -127,8 +178,11 @@ class PaintMixin:
         self.brush_enabled = enabled
         self.preview_label.set_allow_draw(enabled)
         self.paint_toggle_btn.setText("Stop Painting" if enabled else "Start Painting")
+        if enabled and self.crop_btn.isChecked():
+            self.crop_btn.setChecked(False)
         if enabled and self.img is not None:
             self.paint_base = self.img.copy()
+            self.buffers.enforce()
         self.status.setText("Painting is on yo" if enabled else "Painting disabled.")
 
     def set_brush_color(self, rgb: tuple[int, int, int]):
@@ -139,18 +193,23 @@ class PaintMixin:
     def clear_paint(self):
         if self.paint_base is not None:
             self.img = self.paint_base.copy()
+            self.buffers.enforce()
             self.show_image(self.img)
             self.status.setText("Cleaned up your mess brah.")
 
     def on_draw_line(self, x0: int, y0: int, x1: int, y1: int):
         if self.img is None:
             return
-        H, W, _ = self.img.shape
+        # draw into the crop view so strokes stay inside the crop
+        canvas = self.crop_view(self.img)
+        ox, oy = self.crop_offset()
+        x0 -= ox; y0 -= oy; x1 -= ox; y1 -= oy
+        H, W, _ = canvas.shape
         x0 = max(0, min(x0, W - 1)); y0 = max(0, min(y0, H - 1))
         x1 = max(0, min(x1, W - 1)); y1 = max(0, min(y1, H - 1))
         color_rgb = (int(self.brush_color_rgb[0]),
                      int(self.brush_color_rgb[1]),
                      int(self.brush_color_rgb[2]))
-        cv2.line(self.img, (x0, y0), (x1, y1), color_rgb,
+        cv2.line(canvas, (x0, y0), (x1, y1), color_rgb,
                  thickness=self.brush_size, lineType=cv2.LINE_AA)
         self.show_image(self.img, preserve_scale=True)
\ No newline at end of file
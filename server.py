@@ -0,0 +1,426 @@
+'''
+Headless mode: serves the filters, color maps and resize from functions.py over a
+local HTTP API so other tools can use them without the GUI.
+
+    python server.py --port 8205
+
+    POST /filter?name=Sepia                 body = image file, returns PNG
+    POST /resize?width=640&height=480       body = image file, returns PNG
+    GET  /filters                           filter and color map names
+    GET  /metrics                           queue depth, latency, counters
+'''
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import cv2
+
+from colormaps import opencv_colormaps
+from functions import apply_filter, filter_names, resize_image
+
+
+CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+MAX_SIDE = 20000  # same limit as the resize dialog
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class Metrics:
+    """
+    Thread safe counters plus a window of recent job latencies.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._latencies.append(latency)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies)
+            counters = {
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+        def pct(p):
+            if not lat:
+                return 0.0
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 2)
+
+        counters["latency_ms"] = {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+                                  "samples": len(lat)}
+        return counters
+
+
+class Job:
+    def __init__(self, func, payload: bytearray):
+        self.func = func
+        self.payload = payload
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class WorkerPool:
+    """
+    Fixed number of worker threads reading from a bounded job queue.
+
+    reserve() never blocks: when queue_size jobs are already waiting or being
+    uploaded it raises QueueFullError, so the handler can answer 503 before it
+    reads the upload instead of piling up requests. A reserved slot is then
+    either filled with submit() or given back with unreserve(). Each worker takes one job at a time, so a free worker always gets
+    the next job.
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 32):
+        self.metrics = Metrics()
+        self.queue_size = max(1, queue_size)
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._busy = 0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def reserve(self):
+        with self._lock:
+            if self._waiting >= self.queue_size:
+                full = True
+            else:
+                full = False
+                self._waiting += 1
+        if full:
+            self.metrics.record_rejected()
+            raise QueueFullError("queue is full")
+
+    def unreserve(self):
+        with self._lock:
+            self._waiting -= 1
+
+    def submit(self, func, payload: bytearray) -> Future:
+        # uses the slot taken by reserve()
+        job = Job(func, payload)
+        self._queue.put(job)
+        return job.future
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._waiting
+
+    def stats(self) -> dict:
+        with self._lock:
+            waiting, busy = self._waiting, self._busy
+        data = {
+            "queue_depth": waiting,
+            "queue_capacity": self.queue_size,
+            "workers": len(self._threads),
+            "busy_workers": busy,
+        }
+        data.update(self.metrics.snapshot())
+        return data
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._busy += 1
+            try:
+                self._execute(job)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+    def _execute(self, job: Job):
+        with self._lock:
+            self._waiting -= 1
+        if not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = job.func(job.payload)
+        except Exception as e:
+            self.metrics.record(time.perf_counter() - job.enqueued, ok=False)
+            job.future.set_exception(e)
+        else:
+            self.metrics.record(time.perf_counter() - job.enqueued, ok=True)
+            job.future.set_result(result)
+
+
+# Image jobs, run on the worker threads
+
+def decode_image(data: bytearray) -> np.ndarray:
+    buf = np.frombuffer(data, dtype=np.uint8)
+    img_bgr = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if img_bgr is None:
+        raise ValueError("Could not decode image.")
+    return cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+
+def encode_png(img_rgb: np.ndarray) -> bytes:
+    ok, out = cv2.imencode(".png", cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR))
+    if not ok:
+        raise ValueError("Could not encode image.")
+    return out.tobytes()
+
+def filter_job(name: str):
+    def run(payload: bytearray) -> bytes:
+        return encode_png(apply_filter(decode_image(payload), name))
+    return run
+
+def resize_job(width: int, height: int):
+    def run(payload: bytearray) -> bytes:
+        return encode_png(resize_image(decode_image(payload), width, height))
+    return run
+
+class ProcessingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "DollarStorePhotoshop/1.0"
+    # small writes would otherwise wait on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    # set by make_server
+    pool: WorkerPool = None
+    job_timeout = 60.0
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/filters":
+            self._send_json(200, {
+                "filters": filter_names(),
+                "colormaps": list(opencv_colormaps),
+            })
+        elif path == "/metrics":
+            self._send_json(200, self.pool.stats())
+        elif path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        try:
+            if url.path == "/filter":
+                name = params.get("name", [""])[0]
+                if name not in filter_names():
+                    raise ValueError(f"Unknown filter: {name}")
+                func = filter_job(name)
+            elif url.path == "/resize":
+                try:
+                    width = int(params.get("width", ["0"])[0])
+                    height = int(params.get("height", ["0"])[0])
+                except ValueError:
+                    raise ValueError("width and height must be integers")
+                if not (1 <= width <= MAX_SIDE and 1 <= height <= MAX_SIDE):
+                    raise ValueError(f"width and height must be between 1 and {MAX_SIDE}")
+                func = resize_job(width, height)
+            else:
+                self._discard_body()
+                return self._send_json(404, {"error": "Not found"})
+        except ValueError as e:
+            self._discard_body()
+            return self._send_json(400, {"error": str(e)})
+
+        # take a queue slot before reading the upload so a burst can't buffer
+        # a full body per connection just to be turned away
+        try:
+            self.pool.reserve()
+        except QueueFullError:
+            self.close_connection = True
+            return self._send_json(503, {"error": "Server busy, try again."},
+                                   headers={"Retry-After": "1"})
+
+        try:
+            payload = self._read_body()
+        except UploadTooLargeError as e:
+            self.pool.unreserve()
+            self.close_connection = True
+            return self._send_json(413, {"error": str(e)})
+        except ValueError as e:
+            self.pool.unreserve()
+            self.close_connection = True
+            return self._send_json(400, {"error": str(e)})
+
+        future = self.pool.submit(func, payload)
+
+        try:
+            result = future.result(timeout=self.job_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            return self._send_json(504, {"error": "Job timed out."})
+        except ValueError as e:
+            return self._send_json(422, {"error": str(e)})
+        except Exception as e:
+            return self._send_json(500, {"error": f"Processing failed: {e}"})
+
+        self._send_streamed(result, "image/png")
+
+    # Streaming helpers
+
+    def _read_body(self) -> bytearray:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            return self._read_chunked()
+        length = self.headers.get("Content-Length")
+        if length is None:
+            raise ValueError("Content-Length or chunked body required")
+        try:
+            remaining = int(length)
+        except ValueError:
+            raise ValueError("Invalid Content-Length")
+        if remaining < 0:
+            raise ValueError("Invalid Content-Length")
+        if remaining > MAX_UPLOAD_BYTES:
+            raise UploadTooLargeError("Upload too large")
+        body = bytearray()
+        while remaining > 0:
+            chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError("Upload ended early")
+            body += chunk
+            remaining -= len(chunk)
+        return body
+
+    def _read_chunked(self) -> bytearray:
+        body = bytearray()
+        while True:
+            line = self.rfile.readline(1024).strip()
+            try:
+                size = int(line.split(b";")[0], 16)
+            except ValueError:
+                raise ValueError("Invalid chunk size")
+            if size < 0:
+                raise ValueError("Invalid chunk size")
+            if size == 0:
+                # trailing headers end with a blank line
+                while self.rfile.readline(1024).strip():
+                    pass
+                return body
+            if len(body) + size > MAX_UPLOAD_BYTES:
+                raise UploadTooLargeError("Upload too large")
+            while size > 0:
+                chunk = self.rfile.read(min(CHUNK_SIZE, size))
+                if not chunk:
+                    raise ValueError("Upload ended early")
+                body += chunk
+                size -= len(chunk)
+            self.rfile.readline(8)
+
+    def _discard_body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_UPLOAD_BYTES \
+                or "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            # can't tell where the body ends, so don't reuse the connection
+            self.close_connection = True
+            return
+        while length > 0:
+            chunk = self.rfile.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+
+    def _send_streamed(self, data: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        view = memoryview(data)
+        for start in range(0, len(view), CHUNK_SIZE):
+            chunk = view[start:start + CHUNK_SIZE]
+            # one write per chunk: size line, data and CRLF together
+            self.wfile.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, status: int, obj: dict, headers: dict | None = None):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8205, workers: int = 4,
+                queue_size: int = 32, job_timeout: float = 60.0, quiet: bool = False):
+    pool = WorkerPool(workers=workers, queue_size=queue_size)
+    handler = type("Handler", (ProcessingHandler,), {
+        "pool": pool, "job_timeout": job_timeout, "quiet": quiet,
+    })
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    return httpd, pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dollar Store Photoshop processing server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8205)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    httpd, pool = make_server(args.host, args.port, args.workers, args.queue_size,
+                              args.timeout, args.quiet)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()